@@ -1,10 +1,19 @@
 import os
 import re
+import sys
+import math
+import csv
+import json
 import logging
-from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
+import queue
+import threading
 import argparse
+from datetime import datetime, timedelta
+from urllib.parse import urlencode
 import pandas as pd
 from dotenv import load_dotenv
+from lxml import etree, html as lxml_html
 
 from playwright.sync_api import (
     sync_playwright,
@@ -12,9 +21,7 @@ from playwright.sync_api import (
     Error as PWError,
 )
 
-from openpyxl import load_workbook
-from openpyxl.styles import PatternFill, Font
-from openpyxl.utils import get_column_letter
+import xlsxwriter
 
 # ======================
 # НАСТРОЙКИ
@@ -23,6 +30,9 @@ load_dotenv()
 
 BASE_URL = os.getenv("BITRIX_BASE_URL", "https://globaldrive.ru").rstrip("/")
 ENTITY_ID = os.getenv("ENTITY_ID", "4")
+# Номер колонки (td, с 1, считая чекбокс и меню действий) с датой добавления.
+# Если задан — дату ищем только в этой ячейке, иначе во всей строке.
+DATE_COLUMN = int(os.getenv("DATE_COLUMN") or 0)
 
 # --- Путь к реальному файлу с ID (вне репозитория) ---
 EXTERNAL_IDS_PATH = r"C:\work_data\bitrix_ids\ids.csv"
@@ -35,8 +45,14 @@ else:
     INPUT_FILE = "ids_example.csv"
     print("⚠ Используется ids_example.csv — реальный ids.csv не найден")
 OUTPUT_FILE = "bitrix_2025_report.xlsx"
+CHECKPOINT_FILE = "bitrix_2025_report.partial.csv"
+CHECKPOINT_EVERY = 500
 LOG_FILE = "run.log"
+STATE_FILE = ".state.json"  # когда последний раз видели живую сессию админки
+SESSION_FRESH_FOR = timedelta(minutes=10)
 SCREEN_DIR = "screenshots"
+SCREEN_JPEG_QUALITY = 70
+FULL_SCREENS = False  # --full-screens: полноразмерные PNG вместо JPEG видимой области
 
 OK_YEAR = 2025
 
@@ -47,39 +63,143 @@ YANDEX_PROFILE_DIR = "Default"  # если будет другой профил
 # ======================
 # ЛОГИРОВАНИЕ
 # ======================
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s | %(levelname)s | %(message)s",
-    handlers=[logging.FileHandler(LOG_FILE, encoding="utf-8"), logging.StreamHandler()],
-)
-
-DATE_RE = re.compile(r"\d{2}\.\d{2}\.\d{4}\s+\d{2}:\d{2}:\d{2}")
+def setup_logging() -> QueueListener:
+    """
+    Цикл проверки только кладёт записи в очередь, а в файл и консоль
+    их пишет отдельный поток QueueListener — запись лога не тормозит проверку.
+    """
+    formatter = logging.Formatter("%(asctime)s | %(levelname)s | %(message)s")
+    handlers = [logging.FileHandler(LOG_FILE, encoding="utf-8", delay=True), logging.StreamHandler()]
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue = queue.Queue(-1)
+    root = logging.getLogger()
+    root.setLevel(logging.INFO)
+    root.addHandler(QueueHandler(log_queue))
+
+    listener = QueueListener(log_queue, *handlers)
+    listener.start()
+    return listener
+
+
+LOGIN_LOCK = threading.Lock()
+
+# Сколько ID запрашиваем одним списком (фильтр find_id[]). 1 — всегда по одному.
+# Должно быть допустимым размером страницы списка Bitrix (20, 50, 100, ...).
+BATCH_SIZE = 50
+# Принимает ли админка фильтр по нескольким ID: None — ещё не проверяли
+MULTI_ID_FILTER = None
+
+LIST_TABLE_XPATH = "//table[contains(concat(' ', normalize-space(@class), ' '), ' adm-list-table ')]"
+
+# Таблице это не нужно: картинки/шрифты/стили только тянут трафик.
+# document, xhr, fetch и script пропускаем — JS админки может рисовать таблицу.
+BLOCKED_RESOURCE_TYPES = {"image", "font", "media", "stylesheet"}
+
+# Ссылка с текстом ровно = ID в таблице списка -> текст ячейки с датой
+# (или всей строки, если DATE_COLUMN не задан); null, если ссылки нет.
+# ID передаём аргументом, а не подставляем в селектор.
+FIND_ROW_JS = """([id, dateColumn]) => {
+    const a = [...document.querySelectorAll('table.adm-list-table a')]
+        .find(el => el.textContent.trim() === id);
+    if (!a) return null;
+    const tr = a.closest('tr');
+    const cell = dateColumn ? tr.cells[dateColumn - 1] : null;
+    return (cell || tr).innerText;
+}"""
+
+# В админке Bitrix обычно есть ссылка выхода вида ?logout=Y;
+# страница логина — есть оба поля ввода.
+SESSION_STATE_JS = """() => ({
+    admin: !!document.querySelector("a[href*='logout=Y']"),
+    login: !!document.querySelector("input[name='USER_LOGIN']")
+        && !!document.querySelector("input[name='USER_PASSWORD']"),
+})"""
+
+# дд.мм.гггг чч:мм:сс — группы: день, месяц, год, часы, минуты, секунды
+DATE_RE = re.compile(r"(\d{2})\.(\d{2})\.(\d{4})\s+(\d{2}):(\d{2}):(\d{2})")
+
+# Раскраска отчёта по статусу
+COLOR_OK = "#C6EFCE"      # зелёный
+COLOR_FAIL = "#FFC7CE"    # красный
+COLOR_NF = "#FFEB9C"      # жёлтый
+COLOR_ERR = "#D9D9D9"     # серый
+COLOR_BY_STATUS = {"OK": COLOR_OK, "FAIL": COLOR_FAIL, "NOT FOUND": COLOR_NF}  # остальное (ERROR) — серым
+
+REPORT_HEADERS = ["ID", "URL", "Дата добавления", "Год", "Ожидаемый год", "Статус", "Комментарий", "Screenshot"]
+STATUS_COL = REPORT_HEADERS.index("Статус")
+REPORT_WIDTHS = {
+    "ID": 12,
+    "URL": 70,
+    "Дата добавления": 21,
+    "Год": 8,
+    "Ожидаемый год": 16,
+    "Статус": 12,
+    "Комментарий": 70,
+    "Screenshot": 40,
+}
 
 
 def ensure_dirs():
     os.makedirs(SCREEN_DIR, exist_ok=True)
 
 
-def make_url(item_id: str) -> str:
+def block_heavy_resources(context):
+    """Обрываем загрузку картинок, шрифтов, медиа и CSS во всех вкладках контекста."""
+    context.route(
+        "**/*",
+        lambda route: route.abort()
+        if route.request.resource_type in BLOCKED_RESOURCE_TYPES
+        else route.continue_(),
+    )
+
+
+def make_url(ids: list[str]) -> str:
     # Эквивалент “ввела ID + нажала Найти”
+    if len(ids) == 1:
+        return (
+            f"{BASE_URL}/bitrix/admin/highloadblock_rows_list.php"
+            f"?PAGEN_1=1&SIZEN_1=20&ENTITY_ID={ENTITY_ID}&lang=ru"
+            f"&set_filter=Y&adm_filter_applied=0&find_id={ids[0]}"
+        )
+
+    # Пачка: фильтр по нескольким ID сразу, на странице помещается вся пачка
     return (
         f"{BASE_URL}/bitrix/admin/highloadblock_rows_list.php"
-        f"?PAGEN_1=1&SIZEN_1=20&ENTITY_ID={ENTITY_ID}&lang=ru"
-        f"&set_filter=Y&adm_filter_applied=0&find_id={item_id}"
+        f"?PAGEN_1=1&SIZEN_1={BATCH_SIZE}&ENTITY_ID={ENTITY_ID}&lang=ru"
+        f"&set_filter=Y&adm_filter_applied=0&"
+        + urlencode([("find_id[]", item_id) for item_id in ids])
     )
 
 
 def save_screenshot(page, status: str, item_id: str) -> str:
     safe_status = status.replace(" ", "_")
-    path = os.path.join(SCREEN_DIR, f"{safe_status}_{item_id}.png")
     try:
-        page.screenshot(path=path, full_page=True)
+        if FULL_SCREENS:
+            # отладка: вся страница целиком, PNG
+            path = os.path.join(SCREEN_DIR, f"{safe_status}_{item_id}.png")
+            page.screenshot(path=path, full_page=True)
+        else:
+            # для диагностики хватает видимой части — JPEG в разы легче и снимается быстрее
+            path = os.path.join(SCREEN_DIR, f"{safe_status}_{item_id}.jpg")
+            page.screenshot(path=path, full_page=False, type="jpeg", quality=SCREEN_JPEG_QUALITY)
     except Exception:
         # если вкладка уже закрылась — скрин не получится
         return ""
     return path
 
 
+def save_url_screenshot(page, url: str, status: str, item_id: str) -> str:
+    """Скрин выдачи по url: при проверке через запрос вкладка на неё не переходила."""
+    if page.url != url:
+        try:
+            page.goto(url, wait_until="domcontentloaded")
+        except Exception:
+            return ""
+    return save_screenshot(page, status, item_id)
+
+
 def extract_year(text: str) -> tuple[str, int | None]:
     """Возвращает (дата_строкой, год) из текста строки таблицы."""
     text = (text or "").strip()
@@ -88,35 +208,62 @@ def extract_year(text: str) -> tuple[str, int | None]:
         return "", None
 
     date_str = m.group(0)
-    try:
-        year = datetime.strptime(date_str, "%d.%m.%Y %H:%M:%S").year
-        return date_str, year
-    except Exception:
+    # формат фиксированный — год берём из группы, без strptime
+    year = int(m.group(3))
+    if not 1900 <= year <= 2100:
         return date_str, None
+    return date_str, year
 
 
-def is_logged_in_admin(page) -> bool:
-    # В админке Bitrix обычно есть ссылка выхода вида ?logout=Y
-    return page.locator("a[href*='logout=Y']").count() > 0
+def admin_session_state(page) -> dict:
+    """Состояние страницы одним вызовом в браузер: {"admin": в админке, "login": форма логина}."""
+    return page.evaluate(SESSION_STATE_JS)
+
+
+def session_checked_recently() -> bool:
+    """
+    Видели ли живую сессию недавно (.state.json). Тогда запрос к админке не делаем:
+    истёкшую сессию всё равно поймает проверка ID и попросит войти.
+    """
+    try:
+        with open(STATE_FILE, encoding="utf-8") as f:
+            last_ok = datetime.fromisoformat(json.load(f)["last_session_ok"])
+    except (OSError, ValueError, KeyError, TypeError):
+        return False
+    return datetime.now() - last_ok < SESSION_FRESH_FOR
+
+
+def probe_admin_session(context) -> bool:
+    """
+    Живая ли сессия в профиле браузера: лёгкий запрос к админке без открытия вкладки.
+    Время удачной проверки запоминаем в .state.json.
+    """
+    try:
+        resp = context.request.get(f"{BASE_URL}/bitrix/admin/index.php")
+        alive = resp.ok and b"logout=Y" in resp.body()
+    except PWError:
+        return False
+
+    if alive:
+        with open(STATE_FILE, "w", encoding="utf-8") as f:
+            json.dump({"last_session_ok": datetime.now().isoformat(timespec="seconds")}, f)
+    return alive
 
-def is_login_page(page) -> bool:
-    # Страница логина: есть оба поля ввода
-    return (
-        page.locator("input[name='USER_LOGIN']").count() > 0
-        and page.locator("input[name='USER_PASSWORD']").count() > 0
-    )
 
 def ensure_admin_session(page):
     """
     Если мы НЕ в админке и видим форму логина — просим войти.
     Если мы в админке — ничего не делаем.
     """
-    if is_logged_in_admin(page):
+    state = admin_session_state(page)
+    if state["admin"]:
         return
 
-    if is_login_page(page):
-        print("⚠️ Открылась страница логина. Похоже, сессия закончилась.")
-        input("👉 Войди в админку в этом окне и нажми ENTER, чтобы продолжить...")
+    if state["login"]:
+        # при --workers > 1 просим войти по одному окну за раз
+        with LOGIN_LOCK:
+            print("⚠️ Открылась страница логина. Похоже, сессия закончилась.")
+            input("👉 Войди в админку в этом окне и нажми ENTER, чтобы продолжить...")
         return
 
     # Если ни логина, ни админки — просто подождём чуть-чуть (страница могла не догрузиться)
@@ -126,59 +273,72 @@ def ensure_admin_session(page):
 
 def wait_for_table(page):
     """Ждём появления таблицы в списке HL-блока."""
+    # локатор создаём один раз на оба ожидания
+    table = page.locator("table.adm-list-table").first
     try:
-        page.wait_for_selector("table.adm-list-table", timeout=15000)
+        table.wait_for(timeout=15000)
     except PWTimeoutError:
         # возможно нас выкинуло на логин
         ensure_admin_session(page)
-        page.wait_for_selector("table.adm-list-table", timeout=15000)
+        table.wait_for(timeout=15000)
 
 
-def colorize_excel(path: str):
-    """Красим строки по статусу + делаем шапку жирной + автоширина колонок."""
-    wb = load_workbook(path)
-    ws = wb.active
+class ReportWriter:
+    """
+    Потоковая запись отчёта: каждая строка сразу уходит в Excel (xlsxwriter,
+    constant_memory), в памяти весь отчёт не копится. Параллельно пишем CSV-чекпоинт
+    и сбрасываем его на диск каждые CHECKPOINT_EVERY строк — при вылете видно, докуда дошли.
+    """
 
-    fill_ok = PatternFill("solid", fgColor="C6EFCE")      # зелёный
-    fill_fail = PatternFill("solid", fgColor="FFC7CE")    # красный
-    fill_nf = PatternFill("solid", fgColor="FFEB9C")      # жёлтый
-    fill_err = PatternFill("solid", fgColor="D9D9D9")     # серый
+    def __init__(self, path: str):
+        self.path = path
+        self.count = 0
+        self.lock = threading.Lock()
+
+        # URL пишем обычным текстом, а не гиперссылками
+        self.wb = xlsxwriter.Workbook(path, {"constant_memory": True, "strings_to_urls": False})
+        self.ws = self.wb.add_worksheet()
+        # форматы создаём один раз — строка красится прямо при записи
+        self.fmt_by_status = {
+            status: self.wb.add_format({"bg_color": color}) for status, color in COLOR_BY_STATUS.items()
+        }
+        self.fmt_err = self.wb.add_format({"bg_color": COLOR_ERR})
+
+        # при потоковой записи автоширину не посчитать — ширины колонок задаём заранее
+        for c, h in enumerate(REPORT_HEADERS):
+            self.ws.set_column(c, c, REPORT_WIDTHS[h])
+        self.ws.write_row(0, 0, REPORT_HEADERS, self.wb.add_format({"bold": True}))
+
+        self.checkpoint = open(CHECKPOINT_FILE, "w", newline="", encoding="utf-8-sig")
+        self.checkpoint_csv = csv.writer(self.checkpoint)
+        # № — позиция ID во входном списке (как в --start-from): при нескольких воркерах
+        # строки идут в порядке завершения, и продолжать надо с первого пропущенного №
+        self.checkpoint_csv.writerow(["№"] + REPORT_HEADERS)
+
+    def append(self, position: int, result: dict):
+        values = [result.get(h) for h in REPORT_HEADERS]
+        fmt = self.fmt_by_status.get(values[STATUS_COL], self.fmt_err)
+
+        # воркеры пишут из разных потоков, а constant_memory требует строк строго по порядку
+        with self.lock:
+            self.count += 1
+            self.ws.write_row(self.count, 0, values, fmt)
+            self.checkpoint_csv.writerow([position] + values)
+            if self.count % CHECKPOINT_EVERY == 0:
+                self.checkpoint.flush()
+                logging.info(f"💾 Checkpoint: {self.count} rows -> {CHECKPOINT_FILE}")
+
+    def close(self, completed: bool):
+        """
+        Сохраняем Excel. CSV-чекпоинт удаляем, только если прогон дошёл до конца:
+        после вылета или Ctrl-C по его колонке № видно, с какой позиции продолжать.
+        """
+        self.checkpoint.close()
+        self.wb.close()
+        if completed:
+            os.remove(CHECKPOINT_FILE)
 
-    for cell in ws[1]:
-        cell.font = Font(bold=True)
 
-    headers = [c.value for c in ws[1]]
-    try:
-        status_col = headers.index("Статус") + 1
-    except ValueError:
-        wb.save(path)
-        return
-
-    for r in range(2, ws.max_row + 1):
-        status = ws.cell(row=r, column=status_col).value
-        if status == "OK":
-            fill = fill_ok
-        elif status == "FAIL":
-            fill = fill_fail
-        elif status == "NOT FOUND":
-            fill = fill_nf
-        else:
-            fill = fill_err
-
-        for c in range(1, ws.max_column + 1):
-            ws.cell(row=r, column=c).fill = fill
-
-    for c in range(1, ws.max_column + 1):
-        max_len = 0
-        col_letter = get_column_letter(c)
-        for r in range(1, ws.max_row + 1):
-            v = ws.cell(row=r, column=c).value
-            if v is None:
-                continue
-            max_len = max(max_len, len(str(v)))
-        ws.column_dimensions[col_letter].width = min(max_len + 2, 70)
-
-    wb.save(path)
 EXTERNAL_IDS_PATH = r"C:\work_data\bitrix_ids\ids.csv"
 EXAMPLE_IDS_FILE = "ids_example.csv"
 
@@ -203,6 +363,17 @@ def parse_args():
         default=1,
         help="Начать проверку с N-й строки (нумерация с 1). По умолчанию 1.",
     )
+    parser.add_argument(
+        "--full-screens",
+        action="store_true",
+        help="Скриншоты всей страницы в PNG (для отладки). По умолчанию — JPEG видимой области.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Сколько вкладок/браузеров проверяют ID параллельно. По умолчанию 1.",
+    )
     return parser.parse_args()
 
 
@@ -232,11 +403,12 @@ def load_ids_from_csv(path: str) -> list[str]:
     - если есть колонка ID -> берёт её
     - иначе берёт первый столбец
     - чистит пустые/NaN/пробелы
+    - убирает повторы ID
     """
     if not os.path.exists(path):
         raise FileNotFoundError(f"Файл не найден: {path}")
 
-    df = pd.read_csv(path)
+    df = pd.read_csv(path, engine="pyarrow", dtype_backend="pyarrow")
 
     if df.empty:
         raise ValueError(f"Файл пустой: {path}")
@@ -246,39 +418,273 @@ def load_ids_from_csv(path: str) -> list[str]:
     else:
         raw = df.iloc[:, 0]
 
-    ids = raw.astype(str).str.strip().tolist()
-    ids = [x for x in ids if x and x.lower() != "nan"]
+    # чистим векторно на строковых ядрах pyarrow: одна маска вместо цикла по строкам
+    s = raw.astype("string[pyarrow]").str.strip()
+    mask = s.str.len().gt(0) & ~s.str.match(r"(?i)^nan$")
+    ids = s[mask.fillna(False)].tolist()
 
     if len(ids) == 0:
         raise ValueError(f"В файле нет валидных ID: {path}")
 
-    return ids
+    # дубли (например, после склейки списков) убираем, сохраняя порядок
+    unique_ids = list(dict.fromkeys(ids))
+    if len(unique_ids) < len(ids):
+        logging.info(f"Duplicate IDs skipped: {len(ids) - len(unique_ids)}")
 
+    return unique_ids
 
-def main():
-    ensure_dirs()
 
-    args = parse_args()
-input_file = resolve_input_file(args)
+def row_date_text(tr) -> str:
+    """Текст ячейки с датой (DATE_COLUMN), а если колонка не задана — всех ячеек строки."""
+    cells = tr.xpath("./td")
+    if DATE_COLUMN and DATE_COLUMN <= len(cells):
+        return cells[DATE_COLUMN - 1].text_content().strip()
+    return "\t".join(td.text_content().strip() for td in cells)
+
 
-ids = load_ids_from_csv(input_file)
+def list_table_in_html(body: bytes):
+    """
+    Таблица списка из ответа (None — таблицы нет: ошибка, нет доступа, пустой/битый ответ).
+    Разбираем байты, а не текст: lxml сам возьмёт кодировку из meta (бывает windows-1251).
+    """
+    try:
+        tables = lxml_html.fromstring(body).xpath(LIST_TABLE_XPATH)
+    except (etree.LxmlError, ValueError):
+        return None
+    return tables[0] if tables else None
 
-# старт с нужной строки
-start_from = max(args.start_from, 1)
-ids = ids[start_from - 1 :]
 
-logging.info(f"IDs source: {input_file}")
-logging.info(f"IDs loaded: {len(ids)} (start from {start_from})")
+def find_row_text_in_html(table, item_id: str) -> str | None:
+    """Текст строки с нужным ID из таблицы списка (None — строки нет)."""
+    rows = table.xpath(".//a[normalize-space()=$id]/ancestor::tr[1]", id=item_id)
+    if not rows:
+        return None
+    return row_date_text(rows[0])
 
-# если запущен демо-режим, напомним, что это пример
-if input_file == EXAMPLE_IDS_FILE:
-    print("ℹ Запущен DEMO режим (ids_example.csv). Для рабочих проверок используй --prod.")
 
+def find_rows_in_html(table, ids: list[str]) -> dict[str, str] | None:
+    """
+    Тексты строк для пачки ID из таблицы списка: {ID: текст строки}, ненайденных ID в словаре нет.
+    None — фильтр по нескольким ID не сработал: в таблице есть чужие строки.
+    """
+    wanted = set(ids)
+    rows = table.xpath(".//tr[contains(concat(' ', normalize-space(@class), ' '), ' adm-list-table-row ')]")
+    found = {}
+    for tr in rows:
+        for a in tr.xpath(".//a"):
+            text = a.text_content().strip()
+            if text in wanted:
+                found[text] = row_date_text(tr)
+                break
+
+    if len(found) < len(rows):
+        return None
+    return found
+
+
+def find_row_text_on_page(page, url: str, item_id: str) -> str | None:
+    """Запасной путь через вкладку: открыть список, дождаться таблицы, найти строку."""
+    # ждём весь документ: видимая таблица ещё не значит, что все её строки пришли
+    page.goto(url, wait_until="domcontentloaded")
+
+    # # сначала дождались таблицы
+    wait_for_table(page)
+
+    # потом проверили, что мы не на логине
+    ensure_admin_session(page)
+
+    # ИЩЕМ СТРОКУ ПО КОНКРЕТНОМУ ID — один вызов в браузер вместо цепочки локаторов
+    return page.evaluate(FIND_ROW_JS, [item_id, DATE_COLUMN])
+
+
+def report_row(item_id: str, url: str, status: str, date_text: str = "", year: int | None = None,
+               comment: str = "", screenshot_path: str = "") -> dict:
+    return {
+        "ID": item_id,
+        "URL": url,
+        "Дата добавления": date_text,
+        "Год": year,
+        "Ожидаемый год": OK_YEAR,
+        "Статус": status,
+        "Комментарий": comment,
+        "Screenshot": screenshot_path,
+    }
+
+
+def row_result(page, item_id: str, row_text: str | None) -> dict:
+    """Строка отчёта по тексту найденной строки таблицы (None — ID не найден)."""
+    url = make_url([item_id])
+
+    if row_text is None:
+        status = "NOT FOUND"
+        return report_row(
+            item_id, url, status,
+            comment="ID не найден в таблице (фильтр/результат пустой)",
+            screenshot_path=save_url_screenshot(page, url, status, item_id),
+        )
 
+    date_text, year = extract_year(row_text)
 
+    if year == OK_YEAR:
+        return report_row(item_id, url, "OK", date_text, year)
 
-    results = []
+    status = "FAIL"
+    return report_row(
+        item_id, url, status, date_text, year,
+        comment=f"Ожидали {OK_YEAR}, фактически: {year if year else 'не распознано'}",
+        screenshot_path=save_url_screenshot(page, url, status, item_id),
+    )
 
+
+def check_id(page, item_id: str) -> dict:
+    """Проверяет один ID на переданной вкладке и возвращает строку отчёта."""
+    url = make_url([item_id])
+
+    try:
+        # Только HTML списка через запрос с куками контекста — без рендера, JS и картинок
+        resp = page.request.get(url)
+        body = resp.body()
+        table = list_table_in_html(body) if resp.ok and b"USER_LOGIN" not in body else None
+
+        if table is None:
+            # сессия закончилась или вместо списка пришла ошибка — идём через вкладку:
+            # там попросят войти заново, а если таблицы так и нет — будет ERROR по таймауту
+            row_text = find_row_text_on_page(page, url, item_id)
+        else:
+            row_text = find_row_text_in_html(table, item_id)
+
+        return row_result(page, item_id, row_text)
+
+    except PWTimeoutError as e:
+        status = "ERROR"
+        return report_row(
+            item_id, url, status,
+            comment=f"Timeout: {e}",
+            screenshot_path=save_screenshot(page, status, item_id),
+        )
+
+    except PWError as e:
+        # сюда попадают TargetClosedError и прочие ошибки Playwright
+        status = "ERROR"
+        screenshot_path = save_screenshot(page, status, item_id)
+
+        # если вкладка/сессия упала — попробуем открыть админку заново
+        try:
+            page.goto(f"{BASE_URL}/bitrix/admin/", wait_until="domcontentloaded")
+            ensure_admin_session(page)
+        except Exception:
+            pass
+
+        return report_row(
+            item_id, url, status,
+            comment=f"Playwright error (возможен вылет вкладки/сессии): {e}",
+            screenshot_path=screenshot_path,
+        )
+
+    except Exception as e:
+        status = "ERROR"
+        return report_row(
+            item_id, url, status,
+            comment=f"Exception: {e}",
+            screenshot_path=save_screenshot(page, status, item_id),
+        )
+
+
+def check_batch(page, batch: list[str]) -> list[dict]:
+    """
+    Проверяет пачку ID одним запросом списка с фильтром по нескольким ID.
+    Если админка такой фильтр не принимает (или сессия истекла) — проверяем по одному;
+    ID, которых нет в выдаче пачки, тоже перепроверяются по одному.
+    """
+    global MULTI_ID_FILTER
+
+    if len(batch) == 1 or MULTI_ID_FILTER is False:
+        return [check_id(page, item_id) for item_id in batch]
+
+    try:
+        resp = page.request.get(make_url(batch))
+        body = resp.body()
+        table = list_table_in_html(body) if resp.ok and b"USER_LOGIN" not in body else None
+        rows = find_rows_in_html(table, batch) if table is not None else None
+    except Exception:
+        # ошибка запроса или пустой/битый ответ — эту пачку проверяем по одному,
+        # check_id сам запишет ERROR, если ID действительно не проверить
+        return [check_id(page, item_id) for item_id in batch]
+
+    if table is None:
+        # сессия закончилась или разовая ошибка сервера — о фильтре это ничего не говорит,
+        # только эту пачку проверяем по одному
+        return [check_id(page, item_id) for item_id in batch]
+
+    if rows is None:
+        # чужие строки в выдаче: фильтр проигнорирован. Отключаем пачки, только пока
+        # фильтр ещё не подтверждён — после подтверждения это сбой одной пачки
+        if MULTI_ID_FILTER is None:
+            logging.warning("Фильтр по нескольким ID не поддерживается — проверяем по одному ID")
+            MULTI_ID_FILTER = False
+        return [check_id(page, item_id) for item_id in batch]
+
+    # Фильтр подтверждаем, только когда в выдаче пришли хотя бы два ID пачки:
+    # пустой ответ или одна строка бывают и при частично применённом фильтре
+    if MULTI_ID_FILTER is None and len(rows) >= 2:
+        MULTI_ID_FILTER = True
+
+    # ID, которых нет в выдаче, перепроверяем по одному — NOT FOUND только по фильтру одного ID
+    return [
+        row_result(page, item_id, rows[item_id]) if item_id in rows else check_id(page, item_id)
+        for item_id in batch
+    ]
+
+
+def process_queue(page, tasks: queue.Queue, report: ReportWriter, total: int):
+    """Забирает (номер первого ID, пачка ID) из очереди, пока она не опустеет, и проверяет их на своей вкладке."""
+    while True:
+        try:
+            start, batch = tasks.get_nowait()
+        except queue.Empty:
+            return
+
+        try:
+            results = check_batch(page, batch)
+        except Exception as e:
+            # сбой одной пачки не должен ронять воркер — пишем ERROR и идём дальше
+            logging.exception(f"Batch from #{start} failed")
+            results = [
+                report_row(item_id, make_url([item_id]), "ERROR", comment=f"Exception: {e}")
+                for item_id in batch
+            ]
+
+        for i, result in enumerate(results, start=start):
+            report.append(i, result)
+
+            logging.info(
+                f"[{i}/{total}] ID={result['ID']} -> {result['Статус']} | year={result['Год']} | {result['Комментарий']}"
+            )
+
+
+def run_worker(storage_state: dict, tasks: queue.Queue, report: ReportWriter, total: int):
+    """
+    Воркер для --workers > 1.
+    Sync API Playwright не потокобезопасен, поэтому у каждого потока свой
+    экземпляр Playwright и свой контекст с куками из залогиненного профиля.
+    """
+    try:
+        with sync_playwright() as p:
+            browser = p.chromium.launch(executable_path=YANDEX_EXE, headless=False)
+            context = browser.new_context(storage_state=storage_state)
+            block_heavy_resources(context)
+            page = context.new_page()
+            try:
+                process_queue(page, tasks, report, total)
+            finally:
+                browser.close()
+    except Exception:
+        # недопроверенные ID поймает сверка в main
+        logging.exception("Worker failed")
+
+
+def run_checks(tasks: queue.Queue, report: ReportWriter, workers: int, total: int):
+    """Открывает браузер, ждёт логина и прогоняет очередь ID (в одной вкладке или в воркерах)."""
     with sync_playwright() as p:
         # Запуск Яндекс.Браузера с копией профиля
         context = p.chromium.launch_persistent_context(
@@ -287,95 +693,91 @@ if input_file == EXAMPLE_IDS_FILE:
             headless=False,
             args=[f"--profile-directory={YANDEX_PROFILE_DIR}"],
         )
+        block_heavy_resources(context)
         page = context.new_page()
 
-        # 2) Открываем админку
-        page.goto(f"{BASE_URL}/bitrix/admin/", wait_until="domcontentloaded")
-        input("👉 Если админка открылась и ты залогинена — нажми ENTER (если нет — войди и нажми ENTER)...")
+        # 2) Открываем админку — только если сессия профиля уже не живая
+        if session_checked_recently() or probe_admin_session(context):
+            logging.info("Сессия админки активна — вход не нужен")
+        else:
+            page.goto(f"{BASE_URL}/bitrix/admin/", wait_until="domcontentloaded")
+            input("👉 Если админка открылась и ты залогинена — нажми ENTER (если нет — войди и нажми ENTER)...")
+            # запомнится, только если вход действительно удался
+            probe_admin_session(context)
 
         # 3) Проверяем IDs
-        for i, item_id in enumerate(ids, start=1):
-            item_id = str(item_id).strip()
-            url = make_url(item_id)
+        if workers == 1:
+            process_queue(page, tasks, report, total)
+        else:
+            logging.info(f"Workers: {workers}")
+            storage_state = context.storage_state()
+            threads = [
+                threading.Thread(
+                    target=run_worker,
+                    args=(storage_state, tasks, report, total),
+                    daemon=True,
+                )
+                for _ in range(workers)
+            ]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
 
-            status = "FAIL"
-            date_text = ""
-            year = None
-            screenshot_path = ""
-            comment = ""
+        context.close()
 
-            try:
-                page.goto(url, wait_until="domcontentloaded")
-
-                # # сначала дождались таблицы
-                wait_for_table(page)
-
-                # потом проверили, что мы не на логине
-                ensure_admin_session(page)
-
-                # ИЩЕМ СТРОКУ ПО КОНКРЕТНОМУ ID 
-                id_link = page.locator(f"a:has-text('{item_id}')").first
-
-                if id_link.count() == 0:
-                    status = "NOT FOUND"
-                    comment = "ID не найден в таблице (фильтр/результат пустой)"
-                    screenshot_path = save_screenshot(page, status, item_id)
-                else:
-                    row = id_link.locator("xpath=ancestor::tr[1]")
-                    row_text = row.inner_text()
-
-                    date_text, year = extract_year(row_text)
-
-                    if year == OK_YEAR:
-                        status = "OK"
-                    else:
-                        status = "FAIL"
-                        comment = f"Ожидали {OK_YEAR}, фактически: {year if year else 'не распознано'}"
-                        screenshot_path = save_screenshot(page, status, item_id)
-
-            except PWTimeoutError as e:
-                status = "ERROR"
-                comment = f"Timeout: {e}"
-                screenshot_path = save_screenshot(page, status, item_id)
-
-            except PWError as e:
-                # сюда попадают TargetClosedError и прочие ошибки Playwright
-                status = "ERROR"
-                comment = f"Playwright error (возможен вылет вкладки/сессии): {e}"
-                screenshot_path = save_screenshot(page, status, item_id)
-
-                # если вкладка/сессия упала — попробуем открыть админку заново
-                try:
-                    page.goto(f"{BASE_URL}/bitrix/admin/", wait_until="domcontentloaded")
-                    ensure_admin_session(page)
-                except Exception:
-                    pass
-
-            except Exception as e:
-                status = "ERROR"
-                comment = f"Exception: {e}"
-                screenshot_path = save_screenshot(page, status, item_id)
-
-            results.append(
-                {
-                    "ID": item_id,
-                    "URL": url,
-                    "Дата добавления": date_text,
-                    "Год": year,
-                    "Ожидаемый год": OK_YEAR,
-                    "Статус": status,
-                    "Комментарий": comment,
-                    "Screenshot": screenshot_path,
-                }
-            )
 
-            logging.info(f"[{i}/{len(ids)}] ID={item_id} -> {status} | year={year} | {comment}")
+def main():
+    global FULL_SCREENS
 
-        context.close()
+    ensure_dirs()
 
-    # 4) Excel + раскраска
-    pd.DataFrame(results).to_excel(OUTPUT_FILE, index=False)
-    colorize_excel(OUTPUT_FILE)
+    args = parse_args()
+    FULL_SCREENS = args.full_screens
+    input_file = resolve_input_file(args)
+
+    ids = load_ids_from_csv(input_file)
+
+    # старт с нужной строки
+    start_from = max(args.start_from, 1)
+    ids = ids[start_from - 1 :]
+
+    logging.info(f"IDs source: {input_file}")
+    logging.info(f"IDs loaded: {len(ids)} (start from {start_from})")
+
+    # если запущен демо-режим, напомним, что это пример
+    if input_file == EXAMPLE_IDS_FILE:
+        print("ℹ Запущен DEMO режим (ids_example.csv). Для рабочих проверок используй --prod.")
+
+    workers = max(args.workers, 1)
+
+    tasks = queue.Queue()
+    ids = [str(item_id).strip() for item_id in ids]
+    # пачки не крупнее, чем нужно, чтобы работа досталась каждому воркеру
+    # (размер страницы SIZEN_1 при этом остаётся BATCH_SIZE)
+    batch_size = min(BATCH_SIZE, max(math.ceil(len(ids) / workers), 1))
+
+    # номера ID считаем от начала списка, чтобы они совпадали с --start-from
+    for start in range(0, len(ids), batch_size):
+        tasks.put((start_from + start, ids[start : start + batch_size]))
+
+    # 4) Excel + раскраска — строки пишутся по мере проверки
+    report = ReportWriter(OUTPUT_FILE)
+
+    completed = False
+    try:
+        run_checks(tasks, report, workers, start_from - 1 + len(ids))
+        # воркер мог упасть и унести свою пачку — сверяем, что проверены все ID
+        completed = tasks.empty() and report.count == len(ids)
+    finally:
+        report.close(completed)
+
+    if not completed:
+        logging.error(
+            f"❌ В отчёт попало {report.count} из {len(ids)} ID — часть проверок не выполнена. "
+            f"Продолжить можно по чекпоинту: {CHECKPOINT_FILE}"
+        )
+        sys.exit(1)
 
     logging.info(f"✅ Done. Report: {OUTPUT_FILE}")
     logging.info(f"📝 Log: {LOG_FILE}")
@@ -383,4 +785,9 @@ if input_file == EXAMPLE_IDS_FILE:
 
 
 if __name__ == "__main__":
-    main()
+    log_listener = setup_logging()
+    try:
+        main()
+    finally:
+        # дописываем всё, что осталось в очереди логов
+        log_listener.stop()